@@ -1,18 +1,47 @@
+import errno
 import itertools
-from dataclasses import dataclass
+import os
+import sys
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Optional, TypeVar
 
 from maturin_import_hook._logging import logger
 
 try:
-    import tomllib
+    # optional native parsers which are considerably faster than the pure python tomllib/tomli
+    from pytomlpp import loads as _toml_loads
 except ModuleNotFoundError:
-    import tomli as tomllib
+    try:
+        from rtoml import loads as _toml_loads
+    except ModuleNotFoundError:
+        try:
+            from tomllib import loads as _toml_loads
+        except ModuleNotFoundError:
+            from tomli import loads as _toml_loads
 
 
 _T = TypeVar("_T")
 
+# `slots` is only supported by dataclasses from python 3.10
+_DATACLASS_SLOTS: dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# errors for which `Path.exists()` returns False rather than raising
+_MISSING_FILE_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP)
+
+# keys used to look up values from pyproject.toml and Cargo.toml files
+_K_BUILD_SYSTEM_REQUIRES = ("build-system", "requires")
+_K_MODULE_NAME = ("tool", "maturin", "module-name")
+_K_LIB_NAME = ("lib", "name")
+_K_PROJECT_NAME = ("project", "name")
+_K_PACKAGE_NAME = ("package", "name")
+_K_MANIFEST_PATH = ("tool", "maturin", "manifest-path")
+_K_PYTHON_SOURCE = ("tool", "maturin", "python-source")
+_K_PYTHON_PACKAGES = ("tool", "maturin", "python-packages")
+_K_DEPENDENCIES = ("dependencies",)
+
 
 class _TomlFile:
     def __init__(self, path: Path, data: dict[Any, Any]) -> None:
@@ -22,78 +51,186 @@ class _TomlFile:
     @staticmethod
     def load(path: Path) -> "_TomlFile":
         with path.open("rb") as f:
-            data = tomllib.load(f)
-        return _TomlFile(path, data)
+            data = f.read()
+        return _TomlFile(path, _toml_loads(data.decode()))
+
+    @staticmethod
+    def try_load(path: Path) -> Optional["_TomlFile"]:
+        """Load the file if it exists. This avoids a separate syscall to check whether the file exists first.
+
+        like `Path.exists()`, a path that cannot exist (e.g. because a parent is a file) is treated as missing.
+        """
+        try:
+            return _TomlFile.load(path)
+        except OSError as e:
+            if e.errno not in _MISSING_FILE_ERRNOS:
+                raise
+            return None
 
     @staticmethod
     def from_string(path: Path, data_str: str) -> "_TomlFile":
-        return _TomlFile(path, tomllib.loads(data_str))
+        return _TomlFile(path, _toml_loads(data_str))
 
-    def get_value_or_default(self, keys: list[str], required_type: type[_T], default: _T) -> _T:
+    def get_value_or_default(self, keys: Sequence[str], required_type: type[_T], default: _T) -> _T:
         value = self.get_value(keys, required_type)
         return default if value is None else value
 
-    def get_value(self, keys: list[str], required_type: type[_T]) -> Optional[_T]:
+    def get_value(self, keys: Sequence[str], required_type: type[_T]) -> Optional[_T]:
         assert keys
+        # this is called many times when resolving a project so is written to be fast rather than concise.
+        # the parsed toml only contains builtin types so exact type comparisons can be used instead of isinstance
         current_data: Any = self.data
-        num_keys = len(keys)
-        parent_invalid = False
-        for i, key in enumerate(keys):
+        for key in keys[:-1]:
             current_data = current_data.get(key)
             if current_data is None:
                 return None
-            elif i < num_keys - 1 and not isinstance(current_data, dict):
-                parent_invalid = True
-                break
-
-        if parent_invalid or not isinstance(current_data, required_type):
-            logger.error(
-                "failed to get %s value at '%s' from toml file: '%s'",
-                required_type.__name__,
-                ".".join(keys),
-                self.path,
-            )
+            if type(current_data) is not dict:
+                self.log_invalid_value(keys, required_type)
+                return None
+        value = current_data.get(keys[-1])
+        if value is None:
             return None
-        else:
-            return current_data
-
-
-def find_cargo_manifest(project_dir: Path) -> Optional[Path]:
-    pyproject_path = project_dir / "pyproject.toml"
-    if pyproject_path.is_file():
-        pyproject_data = pyproject_path.read_text()
-        if "manifest-path" in pyproject_data:
-            pyproject = _TomlFile.from_string(pyproject_path, pyproject_data)
-            relative_manifest_path = pyproject.get_value(["tool", "maturin", "manifest-path"], str)
-            if relative_manifest_path is not None:
-                return project_dir / relative_manifest_path
-
-    manifest_path = project_dir / "Cargo.toml"
-    if manifest_path.is_file():
-        return manifest_path
-    manifest_path = project_dir / "rust/Cargo.toml"
-    if manifest_path.is_file():
-        return manifest_path
+        if type(value) is not required_type:
+            self.log_invalid_value(keys, required_type)
+            return None
+        return value
+
+    def log_invalid_value(self, keys: Sequence[str], required_type: type[Any]) -> None:
+        logger.error(
+            "failed to get %s value at '%s' from toml file: '%s'",
+            required_type.__name__,
+            ".".join(keys),
+            self.path,
+        )
+
+
+# these functions are called for many directories when searching for projects so use `os.path` with strings
+# rather than `pathlib` to avoid creating intermediate `Path` objects.
+
+
+def _try_load_pyproject_for_manifest_path(project_dir: str) -> tuple[bool, Optional[_TomlFile]]:
+    """Returns whether the file could be read and the parsed file if it may specify `tool.maturin.manifest-path`.
+
+    the file is read without checking whether it exists first to save a syscall, and is only parsed if necessary.
+    """
+    pyproject_path = os.path.join(project_dir, "pyproject.toml")  # noqa: PTH118
+    try:
+        with open(pyproject_path) as f:  # noqa: PTH123
+            pyproject_data = f.read()
+    except OSError:
+        return False, None
+    if "manifest-path" in pyproject_data:
+        return True, _TomlFile.from_string(Path(pyproject_path), pyproject_data)
+    return True, None
+
+
+def find_cargo_manifest(project_dir: Path, pyproject: Optional[_TomlFile] = None) -> Optional[Path]:
+    """`pyproject` can be passed if the pyproject.toml of the project has already been loaded."""
+    project_dir_str = os.fspath(project_dir)
+    if pyproject is None:
+        _, pyproject = _try_load_pyproject_for_manifest_path(project_dir_str)
+    return _find_cargo_manifest(project_dir_str, pyproject)
+
+
+def _find_cargo_manifest(project_dir: str, pyproject: Optional[_TomlFile]) -> Optional[Path]:
+    if pyproject is not None:
+        relative_manifest_path = pyproject.get_value(_K_MANIFEST_PATH, str)
+        if relative_manifest_path is not None:
+            return Path(project_dir, relative_manifest_path)
+
+    manifest_path = os.path.join(project_dir, "Cargo.toml")  # noqa: PTH118
+    if os.path.isfile(manifest_path):  # noqa: PTH113
+        return Path(manifest_path)
+    manifest_path = os.path.join(project_dir, "rust", "Cargo.toml")  # noqa: PTH118
+    if os.path.isfile(manifest_path):  # noqa: PTH113
+        return Path(manifest_path)
     return None
 
 
 def is_maybe_maturin_project(directory: Path) -> bool:
-    """note: this function does not check if this really is a maturin project for simplicity."""
-    return (directory / "pyproject.toml").is_file() and find_cargo_manifest(directory) is not None
+    """note: this function does not check if this really is a maturin project for simplicity.
+
+    `ProjectResolver.is_maybe_maturin_project` should be preferred where a resolver is available.
+    """
+    directory_str = os.fspath(directory)
+    pyproject_found, pyproject = _try_load_pyproject_for_manifest_path(directory_str)
+    return pyproject_found and _find_cargo_manifest(directory_str, pyproject) is not None
 
 
 class ProjectResolver:
     def __init__(self) -> None:
         self._resolved_project_cache: dict[Path, Optional[MaturinProject]] = {}
+        # path -> (st_mtime_ns, st_size, parsed file)
+        self._toml_cache: dict[Path, tuple[int, int, _TomlFile]] = {}
+        # directories which failed the `is_maybe_maturin_project` check
+        self._negative_cache: set[Path] = set()
+        # directory -> the closest directory at or above it which may be a maturin project
+        self._project_above_cache: dict[Path, Optional[Path]] = {}
 
     def clear_cache(self) -> None:
         self._resolved_project_cache.clear()
+        self._toml_cache.clear()
+        self._negative_cache.clear()
+        self._project_above_cache.clear()
+
+    def is_maybe_maturin_project(self, directory: Path) -> bool:
+        """Same as the `is_maybe_maturin_project` function but directories which are not projects are cached."""
+        if directory in self._negative_cache:
+            return False
+        # directories are only resolved if they passed the check (even if they then failed to resolve)
+        if directory in self._resolved_project_cache:
+            return True
+        if is_maybe_maturin_project(directory):
+            return True
+        self._negative_cache.add(directory)
+        return False
+
+    def find_maturin_project_above(self, path: Path) -> Optional[Path]:
+        """Find the closest directory at or above `path` which may be a maturin project.
+
+        many search paths share parent directories, so the result is cached for every directory that was checked.
+        """
+        if path in self._project_above_cache:
+            return self._project_above_cache[path]
+        checked = []
+        project_dir = None
+        for search_path in itertools.chain((path,), path.parents):
+            if search_path in self._project_above_cache:
+                project_dir = self._project_above_cache[search_path]
+                break
+            checked.append(search_path)
+            if self.is_maybe_maturin_project(search_path):
+                project_dir = search_path
+                break
+        for search_path in checked:
+            self._project_above_cache[search_path] = project_dir
+        return project_dir
+
+    def try_load_toml(self, path: Path) -> Optional[_TomlFile]:
+        """Load a toml file if it exists, re-using the previously parsed data if the file has not changed since it
+        was parsed.
+
+        the stat used to validate the cache also serves as the check for whether the file exists.
+        """
+        try:
+            stat = path.stat()
+        except OSError as e:
+            if e.errno not in _MISSING_FILE_ERRNOS:
+                raise
+            return None
+        cached = self._toml_cache.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        toml_file = _TomlFile.try_load(path)
+        if toml_file is not None:
+            self._toml_cache[path] = (stat.st_mtime_ns, stat.st_size, toml_file)
+        return toml_file
 
     def resolve(self, project_dir: Path) -> Optional["MaturinProject"]:
         if project_dir not in self._resolved_project_cache:
             resolved = None
             try:
-                resolved = _resolve_project(project_dir)
+                resolved = _resolve_project(project_dir, self)
             except _ProjectResolveError as e:
                 logger.info('failed to resolve project "%s": %s', project_dir, e)
             self._resolved_project_cache[project_dir] = resolved
@@ -102,7 +239,7 @@ class ProjectResolver:
         return resolved
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class MaturinProject:
     cargo_manifest_path: Path
     # the name of the compiled extension module without any suffix
@@ -114,18 +251,20 @@ class MaturinProject:
     python_module: Optional[Path]
     # the location that the compiled extension module is written to when installed in editable/unpacked mode
     extension_module_dir: Optional[Path]
-    # path dependencies listed in the Cargo.toml of the main project
+    # path dependencies listed in the Cargo.toml of the main project (normalised, but symlinks are not resolved)
     immediate_path_dependencies: list[Path]
     # all path dependencies including transitive dependencies
     _all_path_dependencies: Optional[list[Path]] = None
+    # used to load the manifests of path dependencies
+    _resolver: Optional[ProjectResolver] = field(default=None, repr=False, compare=False)
+    # derived from module_full_name in __post_init__. These are computed eagerly rather than with
+    # `functools.cached_property` because that requires an instance `__dict__`, which slotted dataclasses do not have
+    package_name: str = field(init=False, repr=False, compare=False)
+    module_name: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def package_name(self) -> str:
-        return self.module_full_name.split(".")[0]
-
-    @property
-    def module_name(self) -> str:
-        return self.module_full_name.split(".")[-1]
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "package_name", self.module_full_name.partition(".")[0])
+        object.__setattr__(self, "module_name", self.module_full_name.rpartition(".")[2])
 
     @property
     def is_mixed(self) -> bool:
@@ -134,51 +273,63 @@ class MaturinProject:
 
     @property
     def all_path_dependencies(self) -> list[Path]:
-        if self._all_path_dependencies is None:
-            self._all_path_dependencies = _find_all_path_dependencies(self.immediate_path_dependencies)
-        return self._all_path_dependencies
+        all_path_dependencies = self._all_path_dependencies
+        if all_path_dependencies is None:
+            all_path_dependencies = _find_all_path_dependencies(self.immediate_path_dependencies, self._resolver)
+            # the instance is frozen but this is a lazily computed cache rather than part of its value
+            object.__setattr__(self, "_all_path_dependencies", all_path_dependencies)
+        return all_path_dependencies
 
 
-def _find_all_path_dependencies(immediate_path_dependencies: list[Path]) -> list[Path]:
+def _find_all_path_dependencies(
+    immediate_path_dependencies: list[Path], resolver: Optional[ProjectResolver] = None
+) -> list[Path]:
     if not immediate_path_dependencies:
         return []
-    all_path_dependencies: set[Path] = set()
-    to_search = immediate_path_dependencies.copy()
+    if resolver is None:
+        resolver = ProjectResolver()
+    # directories are added when first queued rather than when visited so that each is only loaded once
+    all_path_dependencies: set[str] = {str(p) for p in immediate_path_dependencies}
+    to_search = deque(all_path_dependencies)
     while to_search:
-        dependency_project_dir = to_search.pop()
-        if dependency_project_dir in all_path_dependencies:
+        dependency_project_dir = to_search.popleft()
+        cargo = resolver.try_load_toml(Path(dependency_project_dir, "Cargo.toml"))
+        if cargo is None:
             continue
-        all_path_dependencies.add(dependency_project_dir)
-        manifest_path = dependency_project_dir / "Cargo.toml"
-        if manifest_path.exists():
-            cargo = _TomlFile.load(manifest_path)
-            to_search.extend(_get_immediate_path_dependencies(dependency_project_dir, cargo))
-    return sorted(all_path_dependencies)
+        for path_dependency in _get_immediate_path_dependency_dirs(dependency_project_dir, cargo):
+            if path_dependency not in all_path_dependencies:
+                all_path_dependencies.add(path_dependency)
+                to_search.append(path_dependency)
+    return sorted(Path(p) for p in all_path_dependencies)
 
 
 class _ProjectResolveError(Exception):
     pass
 
 
-def _resolve_project(project_dir: Path) -> MaturinProject:
+def _resolve_project(project_dir: Path, resolver: Optional[ProjectResolver] = None) -> MaturinProject:
     """This follows the same logic as project_layout.rs.
 
     module_writer::write_bindings_module() is the function that copies the extension file to `rust_module / so_filename`
     """
-    pyproject_path = project_dir / "pyproject.toml"
-    if not pyproject_path.exists():
+    if resolver is None:
+        resolver = ProjectResolver()
+    pyproject = resolver.try_load_toml(project_dir / "pyproject.toml")
+    if pyproject is None:
         msg = "no pyproject.toml found"
         raise _ProjectResolveError(msg)
-    pyproject = _TomlFile.load(pyproject_path)
     if not _is_valid_pyproject(pyproject):
         msg = "pyproject.toml is invalid (does not have required fields)"
         raise _ProjectResolveError(msg)
 
-    manifest_path = find_cargo_manifest(project_dir)
+    manifest_path = find_cargo_manifest(project_dir, pyproject)
     if manifest_path is None:
         msg = "no Cargo.toml found"
         raise _ProjectResolveError(msg)
-    cargo = _TomlFile.load(manifest_path)
+    cargo = resolver.try_load_toml(manifest_path)
+    if cargo is None:
+        msg = "no Cargo.toml found"
+        raise _ProjectResolveError(msg)
 
     module_full_name = _resolve_module_name(pyproject, cargo)
     if module_full_name is None:
@@ -203,6 +354,7 @@ def _resolve_project(project_dir: Path) -> MaturinProject:
         python_module=python_module,
         extension_module_dir=extension_module_dir,
         immediate_path_dependencies=immediate_path_dependencies,
+        _resolver=resolver,
     )
 
 
@@ -210,7 +362,7 @@ def _is_valid_pyproject(pyproject: _TomlFile) -> bool:
     """in maturin serde is used to load into a `PyProjectToml` struct.
     This function should match whether the toml would parse correctly"""
     # it should be sufficient to check the required fields rather than match the serde parsing logic exactly
-    return pyproject.get_value(["build-system", "requires"], list) is not None
+    return pyproject.get_value(_K_BUILD_SYSTEM_REQUIRES, list) is not None
 
 
 def _resolve_rust_module(python_dir: Path, module_name: str) -> tuple[Path, Path, str]:
@@ -219,15 +371,13 @@ def _resolve_rust_module(python_dir: Path, module_name: str) -> tuple[Path, Path
     rust_module is the directory that the extension library gets written to when the package is
     installed in editable mode
     """
-    parts = module_name.split(".")
-    if len(parts) > 1:
-        python_module = python_dir / parts[0]
-        extension_module_dir = python_dir / Path(*parts[:-1])
-        extension_module_name = parts[-1]
+    python_dir_str = os.fspath(python_dir)
+    parent_module_name, sep, extension_module_name = module_name.rpartition(".")
+    if sep:
+        python_module = Path(os.path.join(python_dir_str, parent_module_name.partition(".")[0]))  # noqa: PTH118
+        extension_module_dir = Path(os.path.join(python_dir_str, *parent_module_name.split(".")))  # noqa: PTH118
     else:
-        python_module = python_dir / module_name
-        extension_module_dir = python_dir / module_name
-        extension_module_name = module_name
+        python_module = extension_module_dir = Path(os.path.join(python_dir_str, module_name))  # noqa: PTH118
     return python_module, extension_module_dir, extension_module_name
 
 
@@ -241,46 +391,59 @@ def _resolve_module_name(pyproject: _TomlFile, cargo: _TomlFile) -> Optional[str
      * Cargo.toml `package.name`
 
     """
-    module_name = pyproject.get_value(["tool", "maturin", "module-name"], str)
+    module_name = pyproject.get_value(_K_MODULE_NAME, str)
     if module_name is not None:
         return module_name
-    module_name = cargo.get_value(["lib", "name"], str)
+    module_name = cargo.get_value(_K_LIB_NAME, str)
     if module_name is not None:
         return module_name
-    module_name = pyproject.get_value(["project", "name"], str)
+    module_name = pyproject.get_value(_K_PROJECT_NAME, str)
     if module_name is not None:
         return module_name
-    return cargo.get_value(["package", "name"], str)
+    return cargo.get_value(_K_PACKAGE_NAME, str)
 
 
 def _get_immediate_path_dependencies(manifest_dir_path: Path, cargo: _TomlFile) -> list[Path]:
-    path_dependencies: list[Path] = []
-    for dependency in cargo.get_value_or_default(["dependencies"], dict, {}).values():
-        if isinstance(dependency, dict):
-            relative_path: Any = dependency.get("path", None)
-            if relative_path is not None and isinstance(relative_path, str):
-                path_dependencies.append((manifest_dir_path / relative_path).resolve())
-    return path_dependencies
+    return [Path(p) for p in _get_immediate_path_dependency_dirs(str(manifest_dir_path), cargo)]
+
+
+def _get_immediate_path_dependency_dirs(manifest_dir: str, cargo: _TomlFile) -> list[str]:
+    """The paths are made absolute and normalised but symlinks are not resolved.
+
+    `Path.resolve()` would require several syscalls for each dependency when only a consistent path is required.
+    """
+    dependencies = cargo.data.get("dependencies")
+    if dependencies is None:
+        return []
+    if type(dependencies) is not dict:
+        cargo.log_invalid_value(_K_DEPENDENCIES, dict)
+        return []
+    relative_paths = (dependency.get("path") for dependency in dependencies.values() if type(dependency) is dict)
+    return [os.path.abspath(os.path.join(manifest_dir, p)) for p in relative_paths if type(p) is str]  # noqa: PTH100, PTH118
 
 
 def _resolve_py_root(project_dir: Path, pyproject: _TomlFile) -> Path:
     """This follows the same logic as project_layout.rs."""
-    py_root = pyproject.get_value(["tool", "maturin", "python-source"], str)
+    py_root = pyproject.get_value(_K_PYTHON_SOURCE, str)
     if py_root is not None:
         return project_dir / py_root
-    project_name = pyproject.get_value(["project", "name"], str)
+    project_name = pyproject.get_value(_K_PROJECT_NAME, str)
     if project_name is None:
         return project_dir
 
-    rust_cargo_toml_found = (project_dir / "rust/Cargo.toml").exists()
+    # the python sources are only relevant if the rust sources are in a subdirectory, so only look for them if so
+    project_dir_str = str(project_dir)
+    if not os.path.isfile(os.path.join(project_dir_str, "rust", "Cargo.toml")):  # noqa: PTH113, PTH118
+        return project_dir
 
-    python_packages = pyproject.get_value_or_default(["tool", "maturin", "python-packages"], list, [])
+    python_packages = pyproject.get_value_or_default(_K_PYTHON_PACKAGES, list, [])
 
     package_name = project_name.replace("-", "_")
     python_src_found = any(
-        (project_dir / p / "__init__.py").is_file() for p in itertools.chain((f"src/{package_name}/",), python_packages)
+        os.path.isfile(os.path.join(project_dir_str, p, "__init__.py"))  # noqa: PTH113, PTH118
+        for p in itertools.chain((os.path.join("src", package_name),), python_packages)  # noqa: PTH118
     )
-    if rust_cargo_toml_found and python_src_found:
+    if python_src_found:
         return project_dir / "src"
     else:
         return project_dir
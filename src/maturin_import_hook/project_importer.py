@@ -14,7 +14,6 @@ import urllib.parse
 import urllib.request
 from abc import ABC, abstractmethod
 from collections.abc import Iterator, Sequence
-from functools import lru_cache
 from importlib.machinery import ExtensionFileLoader, ModuleSpec, PathFinder
 from pathlib import Path
 from types import ModuleType
@@ -107,7 +106,6 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
         """called by `importlib.invalidate_caches()`"""
         logger.info("clearing cache")
         self._resolver.clear_cache()
-        _find_maturin_project_above.cache_clear()
 
     def find_spec(
         self,
@@ -152,7 +150,7 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
                     if spec is not None:
                         break
 
-            project_dir = _find_maturin_project_above(search_path)
+            project_dir = self._resolver.find_maturin_project_above(search_path)
             if project_dir is not None:
                 logger.debug(
                     'found project above the search path: "%s" ("%s")',
@@ -382,14 +380,6 @@ def _is_editable_installed_package(project_dir: Path, package_name: str) -> bool
     return False
 
 
-@lru_cache(maxsize=4096)
-def _find_maturin_project_above(path: Path) -> Optional[Path]:
-    for search_path in itertools.chain((path,), path.parents):
-        if is_maybe_maturin_project(search_path):
-            return search_path
-    return None
-
-
 def _find_dist_info_path(directory: Path, package_name: str) -> Optional[Path]:
     try:
         names = os.listdir(directory)
@@ -6,11 +6,20 @@ import re
 import subprocess
 import time
 from pathlib import Path
+from typing import Optional
 
 import pytest
 
 from maturin_import_hook._building import BuildCache, BuildStatus, Freshness, get_installation_freshness
-from maturin_import_hook._resolve_project import _ProjectResolveError, _resolve_project, _TomlFile
+from maturin_import_hook._resolve_project import (
+    ProjectResolver,
+    _find_all_path_dependencies,
+    _ProjectResolveError,
+    _resolve_module_name,
+    _resolve_project,
+    _resolve_rust_module,
+    _TomlFile,
+)
 from maturin_import_hook.error import ImportHookError
 from maturin_import_hook.project_importer import _load_dist_info, _uri_to_path
 from maturin_import_hook.settings import MaturinSettings
@@ -393,6 +402,28 @@ def test_toml_file_loading(tmp_path: Path) -> None:
     toml_file = _TomlFile.load(toml_path)
     assert toml_file.path == toml_path
     assert toml_file.data == {"foo": {"bar": 12, "baz": ["a"]}}
+    assert _TomlFile.try_load(tmp_path / "missing.toml") is None
+
+
+def test_toml_file_cache(tmp_path: Path) -> None:
+    toml_path = tmp_path / "my_file.toml"
+    toml_path.write_text("[foo]\nbar = 12")
+    resolver = ProjectResolver()
+    toml_file = resolver.try_load_toml(toml_path)
+    assert toml_file is not None
+    assert toml_file.data == {"foo": {"bar": 12}}
+    assert resolver.try_load_toml(toml_path) is toml_file
+
+    toml_path.write_text("[foo]\nbar = 123")
+    reloaded = resolver.try_load_toml(toml_path)
+    assert reloaded is not None
+    assert reloaded is not toml_file
+    assert reloaded.data == {"foo": {"bar": 123}}
+
+    resolver.clear_cache()
+    assert resolver.try_load_toml(toml_path) is not reloaded
+
+    assert resolver.try_load_toml(tmp_path / "missing.toml") is None
 
 
 def test_toml_file(caplog: pytest.LogCaptureFixture) -> None:
@@ -424,6 +455,114 @@ def test_toml_file(caplog: pytest.LogCaptureFixture) -> None:
     caplog.clear()
 
 
+def test_find_all_path_dependencies(tmp_path: Path) -> None:
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a/Cargo.toml").write_text('[dependencies]\nb = { path = "../b/" }\nf = { path = "../afile" }')
+    (tmp_path / "afile").write_text("")
+    (tmp_path / "b/c").mkdir(parents=True)
+    (tmp_path / "b/Cargo.toml").write_text('[dependencies]\nc = { path = "./c" }\nd = { path = "../missing" }')
+    # cycle back to b
+    (tmp_path / "b/c/Cargo.toml").write_text('[dependencies]\nb = { path = ".." }\nserde = "1"')
+    expected = [tmp_path / "a", tmp_path / "afile", tmp_path / "b", tmp_path / "b/c", tmp_path / "missing"]
+
+    if platform.system() != "Windows":
+        (tmp_path / "loop").mkdir()
+        (tmp_path / "loop/Cargo.toml").symlink_to(tmp_path / "loop/Cargo.toml")
+        (tmp_path / "b/Cargo.toml").write_text(
+            '[dependencies]\nc = { path = "./c" }\nd = { path = "../missing" }\nl = { path = "../loop" }'
+        )
+        expected.append(tmp_path / "loop")
+
+    assert _find_all_path_dependencies([]) == []
+    assert _find_all_path_dependencies([tmp_path / "a"]) == sorted(expected)
+
+
+def test_is_maybe_maturin_project_cache(tmp_path: Path) -> None:
+    resolver = ProjectResolver()
+    assert not resolver.is_maybe_maturin_project(tmp_path)
+
+    (tmp_path / "pyproject.toml").write_text("")
+    (tmp_path / "Cargo.toml").write_text("")
+    assert not resolver.is_maybe_maturin_project(tmp_path)  # cached
+
+    resolver.clear_cache()
+    assert resolver.is_maybe_maturin_project(tmp_path)
+
+    # invalid pyproject.toml. The directory may still be a project
+    assert resolver.resolve(tmp_path) is None
+    assert resolver.is_maybe_maturin_project(tmp_path)
+
+
+def test_find_maturin_project_above(tmp_path: Path) -> None:
+    outer = tmp_path / "outer"
+    inner = outer / "inner"
+    (inner / "a").mkdir(parents=True)
+    (inner / "b").mkdir()
+    (outer / "pyproject.toml").write_text('[build-system]\nrequires = ["maturin"]')
+    (outer / "Cargo.toml").write_text('[package]\nname = "outer"')
+    (inner / "pyproject.toml").write_text("")
+    (inner / "Cargo.toml").write_text("")
+
+    resolver = ProjectResolver()
+    assert resolver.find_maturin_project_above(inner / "a") == inner
+    assert resolver.resolve(inner) is None
+    # the result must not depend on whether the project failed to resolve
+    assert resolver.find_maturin_project_above(inner / "b") == inner
+    assert resolver.find_maturin_project_above(outer) == outer
+
+    # results are cached until the cache is cleared
+    (inner / "pyproject.toml").unlink()
+    assert resolver.find_maturin_project_above(inner / "a") == inner
+    resolver.clear_cache()
+    assert resolver.find_maturin_project_above(inner / "a") == outer
+    assert resolver.find_maturin_project_above(tmp_path) is None
+
+
+def test_resolve_module_name(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+
+    pyproject_path = Path("/pyproject.toml")
+    cargo_path = Path("/Cargo.toml")
+
+    def resolve(pyproject_data: dict[str, object], cargo_data: dict[str, object]) -> Optional[str]:
+        pyproject = _TomlFile(pyproject_path, pyproject_data)
+        return _resolve_module_name(pyproject, _TomlFile(cargo_path, cargo_data))
+
+    pyproject_data: dict[str, object] = {"tool": {"maturin": {"module-name": "a.b"}}, "project": {"name": "c"}}
+    cargo_data: dict[str, object] = {"lib": {"name": "d"}, "package": {"name": "e"}}
+    assert resolve(pyproject_data, cargo_data) == "a.b"
+    assert resolve({"project": {"name": "c"}}, cargo_data) == "d"
+    assert resolve({"project": {"name": "c"}}, {"package": {"name": "e"}}) == "c"
+    assert resolve({}, {"package": {"name": "e"}}) == "e"
+    assert resolve({}, {}) is None
+    assert caplog.messages == []
+
+    assert resolve({"tool": {"maturin": {"module-name": 1}}}, {"package": {"name": "e"}}) == "e"
+    assert caplog.messages == [
+        f"failed to get str value at 'tool.maturin.module-name' from toml file: '{pyproject_path}'"
+    ]
+    caplog.clear()
+
+    # invalid parent tables
+    assert resolve({"tool": 1, "project": {"name": "c"}}, {"lib": ["d"]}) == "c"
+    assert resolve({"tool": {"maturin": 1}, "project": 2}, {"package": {"name": "e"}}) == "e"
+    assert caplog.messages == [
+        f"failed to get str value at 'tool.maturin.module-name' from toml file: '{pyproject_path}'",
+        f"failed to get str value at 'lib.name' from toml file: '{cargo_path}'",
+        f"failed to get str value at 'tool.maturin.module-name' from toml file: '{pyproject_path}'",
+        f"failed to get str value at 'project.name' from toml file: '{pyproject_path}'",
+    ]
+
+
+def test_resolve_rust_module() -> None:
+    python_dir = Path("/x/y")
+    assert _resolve_rust_module(python_dir, "a") == (python_dir / "a", python_dir / "a", "a")
+    assert _resolve_rust_module(python_dir, "a.b.c") == (python_dir / "a", python_dir / "a/b", "c")
+    # leading dots must not escape `python_dir`
+    assert _resolve_rust_module(python_dir, ".a.b") == (python_dir, python_dir / "a", "b")
+    assert _resolve_rust_module(python_dir, "..") == (python_dir, python_dir, "")
+
+
 def test_get_string_between() -> None:
     assert get_string_between("11aaabbbccc11", "aaa", "ccc") == "bbb"
     assert get_string_between("11aaabbbccc11", "xxx", "ccc") is None